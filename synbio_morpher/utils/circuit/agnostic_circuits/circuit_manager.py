@@ -35,7 +35,7 @@ from synbio_morpher.utils.modelling.deterministic import bioreaction_sim_dfx_exp
 from synbio_morpher.utils.modelling.solvers import get_diffrax_solver, make_stepsize_controller, simulate_steady_states
 from synbio_morpher.utils.evolution.evolver import implement_mutation
 from synbio_morpher.utils.evolution.mutation import Mutations
-from synbio_morpher.utils.results.analytics.timeseries import generate_analytics
+from synbio_morpher.utils.results.analytics.timeseries import generate_analytics_batched
 from synbio_morpher.utils.results.result_writer import ResultWriter
 
 
@@ -408,11 +408,11 @@ class CircuitModeller():
 
             signal_time = signal.func.keywords['impulse_center'] if ref_circuit.use_prod_and_deg else t[1]
 
-            analytics_func = jax.vmap(partial(
-                generate_analytics, time=t, labels=[
+            analytics_func = partial(
+                generate_analytics_batched, time=t, labels=[
                     s.name for s in ref_circuit.model.species],
                 signal_onehot=signal.onehot, signal_time=signal_time,  # type: ignore
-                ref_circuit_data=ref_circuit_data))  # type: ignore
+                ref_circuit_data=ref_circuit_data)  # type: ignore
             b_analytics = analytics_func(
                 data=b_new_copynumbers[ref_idx:ref_idx2])
             b_analytics_l = append_nest_dicts(
@@ -5,7 +5,7 @@
 # This source code is licensed under the MIT-style license found in the
 # LICENSE file in the root directory of this source tree. 
     
-import numpy as jnp
+import jax
 import jax.numpy as jnp
 from synbio_morpher.utils.misc.units import SCIENTIFIC
 
@@ -21,6 +21,7 @@ from synbio_morpher.utils.misc.units import SCIENTIFIC
 #     return F
 
 
+@jax.jit
 def equilibrium_constant_reparameterisation(E, initial: jnp.ndarray):
     """ Input: E is $\Delta G$ of binding in kcal/mol. 
     Output: equilibrium constant
@@ -33,12 +34,14 @@ def equilibrium_constant_reparameterisation(E, initial: jnp.ndarray):
     return Fs/initial
 
 
+@jax.jit
 def gibbs_K(E):
     """ In J/mol. dG = - RT ln(K) """
     K = jnp.exp(jnp.divide(-E, SCIENTIFIC['RT']))
     return K
 
 
+@jax.jit
 def gibbs_K_cal(E):
     """ Translate interaction binding energy (kcal) to the
     equilibrium rate of binding.
@@ -50,6 +53,7 @@ def gibbs_K_cal(E):
     return K
 
 
+@jax.jit
 def eqconstant_to_rates(eqconstants, k_f):
     """ Translate the equilibrium rate of binding to
     the rate of binding (either association or dissociation
@@ -59,9 +63,10 @@ def eqconstant_to_rates(eqconstants, k_f):
     k_r: unbinding rate per s"""
     
     k_r = jnp.divide(k_f, eqconstants)
-    return k_f*jnp.ones_like(k_r), k_r
+    return jnp.broadcast_to(jnp.asarray(k_f, dtype=k_r.dtype), k_r.shape), k_r
 
 
+@jax.jit
 def rates_to_eqconstant(k_f, k_r):
     eqconstants = jnp.divide(k_f, k_r)
     return eqconstants
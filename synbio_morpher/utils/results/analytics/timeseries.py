@@ -6,7 +6,9 @@
 # LICENSE file in the root directory of this source tree.
 
 
+from functools import partial
 import numpy as np
+import jax
 import jax.numpy as jnp
 from typing import List, Tuple, Optional
 # from synbio_morpher.utils.misc.type_handling import merge_dicts
@@ -14,6 +16,14 @@ from synbio_morpher.utils.results.analytics.naming import DIFF_KEY, RATIO_KEY
 
 
 TIMEAXIS = 1
+# Working dtype of the analytics. JAX already computes in float32 unless
+# jax_enable_x64 is set, in which case float64 inputs would otherwise double
+# the bytes moved through every reduction over [species, time]. Set this to
+# jnp.float64 (with jax_enable_x64) if the extra precision is needed.
+_DTYPE = jnp.float32
+# Series at least this long find the settling time with a lax.scan over time 
+# instead of a [..., time] boolean mask
+SCAN_MIN_TIME_POINTS = 10000
 
 
 def calculate_adaptation(s, p, alpha=3, s_center=7, p_center=7.5):
@@ -21,12 +31,13 @@ def calculate_adaptation(s, p, alpha=3, s_center=7, p_center=7.5):
     s = sensitivity, p = precision 
     High when s > 1 and p > 10
     """
-    s_log = jnp.log10(s)
-    p_log = jnp.log10(p)
-    a = -(alpha*(s_log - s_center)**2 + (p_log - p_center)**2) + 1000
+    s_log = jnp.log10(jnp.asarray(s, _DTYPE))
+    p_log = jnp.log10(jnp.asarray(p, _DTYPE))
+    a = -(jnp.asarray(alpha, _DTYPE)*(s_log - s_center)**2 +
+          (p_log - p_center)**2) + jnp.asarray(1000, _DTYPE)
     return jnp.where((a > -jnp.inf) & (a < jnp.inf),
                      a,
-                     jnp.nan)
+                     jnp.asarray(jnp.nan, _DTYPE))
     
     
 def compute_adaptability_full(ys_steady, ys_signal, idx_sig, use_sensitivity_func1):
@@ -59,19 +70,30 @@ def compute_adaptability_full(ys_steady, ys_signal, idx_sig, use_sensitivity_fun
     return a, s, p
 
 
+@jax.jit
 def compute_derivative(data):
+    """ Central differences along the time axis, one-sided at the ends, 
+    as in jnp.gradient(data)[1] but without the unused species axis. """
+    data = jnp.asarray(data, _DTYPE)
     if data.shape[TIMEAXIS] <= 1:
-        return np.ones_like(data) * np.inf
-    deriv = jnp.gradient(data)[1]
+        return jnp.full(jnp.shape(data), jnp.inf, dtype=_DTYPE)
+    deriv = jnp.empty_like(data)
+    deriv = deriv.at[:, 1:-1].set((data[:, 2:] - data[:, :-2]) * 0.5)
+    deriv = deriv.at[:, 0].set(data[:, 1] - data[:, 0])
+    deriv = deriv.at[:, -1].set(data[:, -1] - data[:, -2])
     return deriv
 
 
+def _safe_div(numer, denom, fallback):
+    """ numer / denom, with fallback wherever denom is 0. The denominator is 
+    masked before dividing so that no inf / nan is produced (or differentiated 
+    through) in the entries that get discarded. """
+    is_zero = denom == 0
+    return jnp.where(is_zero, fallback, numer / jnp.where(is_zero, 1, denom))
+
+
 def compute_fold_change(starting_states, steady_states):
-    denom = jnp.where(starting_states != 0,
-                      starting_states, -1)
-    fold_change = jnp.where(denom != -1,
-                            steady_states / denom, np.nan)
-    return fold_change
+    return _safe_div(steady_states, starting_states, jnp.asarray(jnp.nan, _DTYPE))
 
 
 def compute_overshoot(steady_states, peaks):
@@ -86,15 +108,16 @@ def compute_peaks_deprecated(initial_steady_states: jnp.ndarray, final_steady_st
     )
 
 
+@jax.jit
 def compute_peaks(initial_steady_states: jnp.ndarray, final_steady_states: jnp.ndarray, maxa: jnp.ndarray, mina: jnp.ndarray):
-    peak = jnp.where(final_steady_states > initial_steady_states, maxa, mina)
-    return jnp.where(initial_steady_states < peak, peak, maxa if peak is mina else mina)
+    """ The extremum in the direction of the change in steady state: the max 
+    for species whose steady state rose and the min otherwise. """
+    return jnp.where(final_steady_states > initial_steady_states, maxa, mina)
 
 
 def calculate_precision_core(output_diff, starting_states, signal_diff, signal_0) -> jnp.ndarray:
-    numer = jnp.where(signal_0 != 0, signal_diff / signal_0, 1)
-    denom = jnp.where((starting_states != 0).astype(int),
-                      output_diff / starting_states, 1)
+    numer = _safe_div(signal_diff, signal_0, 1)
+    denom = _safe_div(output_diff, starting_states, 1)
     return jnp.absolute(jnp.divide(numer, denom))  # type: ignore
     # return jnp.divide(1, precision)
 
@@ -108,13 +131,14 @@ def compute_precision(starting_states, steady_states, signal_0, signal_1):
 
 def calculate_sensitivity_core(output_diff, starting_states, signal_diff, signal_0) -> jnp.ndarray:
     # denom = jnp.where(signal_0 != 0, signal_diff / signal_0, np.inf)
-    numer = jnp.where((starting_states != 0).astype(int),
-                      jnp.where(output_diff != 0, output_diff, np.nan) / starting_states, np.inf)
+    nan, inf = jnp.asarray(jnp.nan, _DTYPE), jnp.asarray(jnp.inf, _DTYPE)
+    numer = _safe_div(jnp.where(output_diff != 0, output_diff, nan),
+                      starting_states, inf)
 
     return jnp.where(signal_0 != 0,
                      jnp.abs(jnp.divide(
-                         numer, signal_diff / signal_0)),  # type: ignore
-                     np.inf)  # type: ignore
+                         numer, _safe_div(signal_diff, signal_0, 1))),  # type: ignore
+                     inf)  # type: ignore
 
 
 def compute_sensitivity(signal_idx: int, starting_states, peaks):
@@ -129,6 +153,20 @@ def compute_sensitivity(signal_idx: int, starting_states, peaks):
     return calculate_sensitivity_core(output_diff, starting_states, signal_diff, signal_0)
 
 
+@partial(jax.jit, inline=True)
+def compute_precision_and_sensitivity(signal_idx: int, starting_states, steady_states, peaks):
+    """ compute_precision and compute_sensitivity for one signal, sharing the 
+    signal difference in a single trace """
+    signal_0 = starting_states[signal_idx]
+    signal_diff = peaks[signal_idx] - signal_0
+
+    precision = calculate_precision_core(
+        steady_states - starting_states, starting_states, signal_diff, signal_0)
+    sensitivity = calculate_sensitivity_core(
+        peaks - starting_states, starting_states, signal_diff, signal_0)
+    return precision, sensitivity
+
+
 def compute_sensitivity2(starting_states, minv, maxv, signal_1, signal_0):
     output_diff = maxv - minv
     signal_diff = signal_1 - signal_0
@@ -137,8 +175,8 @@ def compute_sensitivity2(starting_states, minv, maxv, signal_1, signal_0):
 
 
 def compute_sensitivity_simple(starting_states, peaks, signal_factor):
-    numer = jnp.where((starting_states != 0).astype(int),
-                      (peaks - starting_states) / starting_states, np.inf)
+    numer = _safe_div(peaks - starting_states, starting_states,
+                      jnp.asarray(jnp.inf, _DTYPE))
     return jnp.absolute(jnp.divide(
         numer, signal_factor))  # type: ignore
 
@@ -151,34 +189,62 @@ def compute_rmse(data: np.ndarray, ref_circuit_data: Optional[np.ndarray]):
         jnp.mean(jnp.power(data[:, :t_max] - ref_circuit_data[:, :t_max], 2), axis=1))
 
 
+def _last_outside_scan(data, steady_states, perc_settling_time):
+    """ Index of the last time point outside of the settling band, or -1, 
+    carried through a scan over time so that no [..., time] mask is built. """
+    ss = jnp.broadcast_to(steady_states, data.shape[:-1] + (1,))[..., 0]
+
+    def step(idx_last_outside, i):
+        d_i = jax.lax.dynamic_index_in_dim(data, i, axis=-1, keepdims=False)
+        is_outside = jnp.abs(d_i - ss) > ss * perc_settling_time
+        return jnp.where(is_outside, i, idx_last_outside), None
+
+    idx_last_outside, _ = jax.lax.scan(
+        step, jnp.full(ss.shape, -1), jnp.arange(data.shape[-1]))
+    return idx_last_outside
+
+
 def compute_step_response_times(data, t, steady_states, signal_time: int):
     """ Compute the % settling time of the step response.
     Assumes that data starts pre-perturbation, but after an initial steady state 
-    has been reached. """
+    has been reached. Species that never leave the settling band or never 
+    settle back into it have an infinite response time. """
 
     perc_settling_time = 0.01
-    is_data_outside_stst = (data > (steady_states + steady_states * perc_settling_time)
-                            ) | (data < (steady_states - steady_states * perc_settling_time))
+    t = jnp.asarray(t, _DTYPE)
+    inf = jnp.asarray(jnp.inf, _DTYPE)
+    n_t = data.shape[-1]
 
-    tpre = jnp.max(t * is_data_outside_stst, axis=-1).reshape(-1, 1)
-    del is_data_outside_stst  # free up memory
-    t_stable = t * (t > tpre)
-    t_stable = jnp.where(t_stable != 0, t_stable, np.inf)
-    tstop = jnp.min(t_stable, axis=-1)
+    # Last time point outside of the settling band, -1 if there is none
+    if n_t >= SCAN_MIN_TIME_POINTS:
+        idx_last_outside = _last_outside_scan(data, steady_states, perc_settling_time)
+    else:
+        is_data_outside_stst = jnp.abs(
+            data - steady_states) > steady_states * perc_settling_time
+        idx_last_outside = jnp.where(
+            is_data_outside_stst.any(axis=-1),
+            n_t - 1 - jnp.argmax(is_data_outside_stst[..., ::-1], axis=-1),
+            -1)
+    tstop = jnp.where(idx_last_outside < n_t - 1,
+                      t[jnp.minimum(idx_last_outside + 1, n_t - 1)], inf)
 
     response_times = jnp.where(
-        tstop != 0,
+        idx_last_outside >= 0,
         tstop - signal_time,
-        np.inf
+        inf
     )
     return response_times
 
 
+@jax.jit
 def frequency(data):
-    spectrum = jnp.fft.fft(data)/len(data)
-    spectrum = spectrum[range(int(len(data)/2))]
-    freq = jnp.fft.fftfreq(len(spectrum))
-    return freq
+    """ One-sided spectrum of real data along the last axis, normalised by 
+    the number of time points. Returns the (unit sample spacing) frequencies 
+    and the spectrum. """
+    n_t = data.shape[-1]
+    spectrum = jnp.fft.rfft(data) / n_t
+    freq = jnp.fft.rfftfreq(n_t)
+    return freq, spectrum
 
 
 def log_distance(s, p):
@@ -197,119 +263,188 @@ def sp_prod(s, p, sp_factor=1, s_weight=0):
     return s * (p * (s - s_lin))  # * sp_factor + s_weight)
 
 
+@jax.jit
 def vec_distance(s, p, d):
     """ First row of each direction vector are the x's, second row are the y's """
-    P = jnp.array([s, p]).T
-    # P = [s.T, p.T]
-    sp_rep = np.repeat(d[:, 0][:, None], repeats=len(s), axis=-1).T[:, :, None]
-    AP = jnp.concatenate([sp_rep, P[:, :, None]], axis=-1)
+    P = jnp.stack([s, p], axis=-1)
+    A = jnp.broadcast_to(d[:, 0], P.shape)
+    AP = jnp.stack([A, P], axis=-1)
     area = mag(jnp.cross(AP, d[None, :, :], axis=-1), axis=-1)
     D = area / mag(d)
     return D
 
 
-def generate_base_analytics(data: jnp.ndarray, t: jnp.ndarray, labels: List[str],
-                            signal_onehot: Optional[jnp.ndarray], signal_time,
-                            ref_circuit_data: Optional[jnp.ndarray], include_deriv: bool = False) -> dict:
-    """ Assuming [species, time] for data """
-    signal_idxs = None if signal_onehot is None else [
-        int(i) for i in (np.where(signal_onehot == 1)[0])]
-    if data is None:
-        return {}
-
-    analytics = {
-        # 'initial_steady_states': jnp.expand_dims(data[:, 0], axis=1),
-        # 'max_amount': jnp.expand_dims(jnp.max(data, axis=1), axis=1),
-        # 'min_amount': jnp.expand_dims(jnp.min(data, axis=1), axis=1),
-        # 'steady_states': jnp.expand_dims(data[:, -1], axis=1)
-    }
-
-    analytics['initial_steady_states'] = data[:, 0]
-
-    analytics['max_amount'] = jnp.max(data, axis=1)
+@jax.jit
+def _extrema(data: jnp.ndarray) -> Tuple[jnp.ndarray, jnp.ndarray, jnp.ndarray, jnp.ndarray]:
+    """ First, last, max and min along the time axis of [species, time] data, 
+    together so that XLA streams data through a single fused loop. """
+    return data[:, 0], data[:, -1], jnp.max(data, axis=TIMEAXIS), jnp.min(data, axis=TIMEAXIS)
 
-    analytics['min_amount'] = jnp.min(data, axis=1)
 
-    analytics['steady_states'] = data[:, -1]
+@partial(jax.jit, static_argnames=('signal_idxs_tuple',))
+def _base_analytics_core(data: jnp.ndarray, t: jnp.ndarray, signal_idxs_tuple: Tuple[int, ...],
+                         signal_time, ref_circuit_data: Optional[jnp.ndarray]) -> tuple:
+    """ Per-circuit analytics as one traced graph so that XLA can fuse the 
+    reductions over data. Assuming [species, time] for data and that 
+    signal_idxs_tuple has already been resolved from the signal onehot. """
 
-    analytics['RMSE'] = compute_rmse(
-        data, ref_circuit_data).squeeze()  # type: ignore
+    # No-op under jit, but numpy data can't be indexed by tracers with jit disabled
+    data = jnp.asarray(data, _DTYPE)
+    if ref_circuit_data is not None:
+        ref_circuit_data = jnp.asarray(ref_circuit_data, _DTYPE)
+    initial_steady_states, steady_states, max_amount, min_amount = _extrema(data)
 
-    first_derivative = compute_derivative(data)
-    if include_deriv:
-        analytics['first_derivative'] = first_derivative
+    rmse = compute_rmse(data, ref_circuit_data).squeeze()  # type: ignore
 
-    analytics['fold_change'] = compute_fold_change(
-        starting_states=analytics['initial_steady_states'],
-        steady_states=analytics['steady_states']
+    fold_change = compute_fold_change(
+        starting_states=initial_steady_states,
+        steady_states=steady_states
     )
 
-    peaks = compute_peaks(initial_steady_states=analytics['initial_steady_states'], 
-                          final_steady_states=analytics['steady_states'],
-                          maxa=analytics['max_amount'], 
-                          mina=analytics['min_amount'])
+    peaks = compute_peaks(initial_steady_states=initial_steady_states,
+                          final_steady_states=steady_states,
+                          maxa=max_amount,
+                          mina=min_amount)
 
-    analytics['overshoot'] = compute_overshoot(
-        steady_states=analytics['steady_states'],
+    overshoot = compute_overshoot(
+        steady_states=steady_states,
         peaks=peaks
     )
 
-    if signal_idxs is not None:
-        signal_labels = list(map(labels.__getitem__, signal_idxs))
-        for s, s_idx in zip(signal_labels, signal_idxs):
-
-            p_name = 'precision' if len(signal_idxs) == 1 else f'precision_wrt_species-{s_idx}'
-            r_name = 'response_time' if len(signal_idxs) == 1 else f'response_time_wrt_species-{s_idx}'
-            s_name = 'sensitivity' if len(signal_idxs) == 1 else f'sensitivity_wrt_species-{s_idx}'
-
-            analytics[p_name] = compute_precision(
-                starting_states=analytics['initial_steady_states'],
-                steady_states=analytics['steady_states'],
-                signal_0=analytics['initial_steady_states'][s_idx],
-                signal_1=peaks[s_idx]
-            )
-
-            # t axis: 1
-            t_end = np.min([len(t), data.shape[1]])
-            analytics[r_name] = compute_step_response_times(
-                data=data[:, :t_end], t=t[:t_end], 
-                steady_states=analytics['steady_states'][:, None],
-                signal_time=signal_time)
-
-            analytics[s_name] = compute_sensitivity(
-                signal_idx=s_idx, peaks=peaks, starting_states=analytics['initial_steady_states']
-            )
+    if not signal_idxs_tuple:
+        # Time and signal_time may be None without a signal, so skip tracing per_signal
+        return (initial_steady_states, max_amount, min_amount, steady_states, rmse,
+                fold_change, overshoot, (), (), ())
+
+    # t axis: 1
+    t_end = np.min([len(t), data.shape[1]])
+
+    def per_signal(s_idx):
+        p, s = compute_precision_and_sensitivity(
+            signal_idx=s_idx, starting_states=initial_steady_states,
+            steady_states=steady_states, peaks=peaks)
+        r = compute_step_response_times(
+            data=data[:, :t_end], t=t[:t_end],
+            steady_states=steady_states[:, None],
+            signal_time=signal_time)
+        return p, r, s
+
+    # [signals, species] each, split per signal here so that the slicing is traced
+    precisions, response_times, sensitivities = [tuple(a) for a in jax.vmap(per_signal)(
+        jnp.asarray(signal_idxs_tuple, dtype=int))]
+
+    return (initial_steady_states, max_amount, min_amount, steady_states, rmse,
+            fold_change, overshoot, precisions, response_times, sensitivities)
+
+
+@partial(jax.jit, static_argnames=('signal_idxs_tuple', 'ref_batched'))
+def _base_analytics_core_batched(data: jnp.ndarray, t: jnp.ndarray, signal_idxs_tuple: Tuple[int, ...],
+                                 signal_time, ref_circuit_data: Optional[jnp.ndarray],
+                                 ref_batched: bool) -> tuple:
+    """ _base_analytics_core vmapped over a leading circuit axis of data, and 
+    of ref_circuit_data if ref_batched. """
+    return jax.vmap(lambda d, r: _base_analytics_core(d, t, signal_idxs_tuple, signal_time, r),
+                    in_axes=(0, 0 if ref_batched else None))(data, ref_circuit_data)
+
+
+def get_signal_idxs(signal_onehot: Optional[jnp.ndarray]) -> Tuple[int, ...]:
+    """ Resolve the signal onehot into a static tuple of species indices """
+    return () if signal_onehot is None else tuple(
+        int(i) for i in (np.where(signal_onehot == 1)[0]))
+
+
+def make_analytics_dict(base_analytics: tuple, signal_idxs: Tuple[int, ...]) -> dict:
+    """ Name the outputs of _base_analytics_core """
+    (initial_steady_states, max_amount, min_amount, steady_states, rmse, fold_change,
+     overshoot, precisions, response_times, sensitivities) = base_analytics
+
+    analytics = {
+        'initial_steady_states': initial_steady_states,
+        'max_amount': max_amount,
+        'min_amount': min_amount,
+        'steady_states': steady_states,
+        'RMSE': rmse,
+        'fold_change': fold_change,
+        'overshoot': overshoot
+    }
+
+    for s_idx, p, r, s in zip(signal_idxs, precisions, response_times, sensitivities):
+
+        p_name = 'precision' if len(signal_idxs) == 1 else f'precision_wrt_species-{s_idx}'
+        r_name = 'response_time' if len(signal_idxs) == 1 else f'response_time_wrt_species-{s_idx}'
+        s_name = 'sensitivity' if len(signal_idxs) == 1 else f'sensitivity_wrt_species-{s_idx}'
+
+        analytics[p_name] = p
+        analytics[r_name] = r
+        analytics[s_name] = s
     return analytics
 
 
+def generate_base_analytics(data: jnp.ndarray, t: jnp.ndarray, labels: List[str],
+                            signal_onehot: Optional[jnp.ndarray], signal_time,
+                            ref_circuit_data: Optional[jnp.ndarray], include_deriv: bool = False) -> dict:
+    """ Assuming [species, time] for data """
+    signal_idxs = get_signal_idxs(signal_onehot)
+    if data is None:
+        return {}
+
+    analytics = make_analytics_dict(_base_analytics_core(
+        data, t, signal_idxs_tuple=signal_idxs, signal_time=signal_time,
+        ref_circuit_data=ref_circuit_data), signal_idxs)
+
+    if include_deriv:
+        analytics['first_derivative'] = compute_derivative(data)
+    return analytics
+
+
+@jax.jit
+def _differences_ratios(analytics: dict, ref_analytics: dict) -> Tuple[dict, dict]:
+    """ Elementwise over all analytics at once. Leaves must have matching shapes. """
+    differences = jax.tree_util.tree_map(jnp.subtract, analytics, ref_analytics)
+    ratios = jax.tree_util.tree_map(
+        lambda a, r: _safe_div(a, r, jnp.asarray(jnp.inf, _DTYPE)), analytics, ref_analytics)
+    return differences, ratios
+
+
 def generate_differences_ratios(analytics: dict, ref_analytics) -> Tuple[dict, dict]:
+    """ Time series analytics (e.g. first_derivative) are truncated to the 
+    shorter time axis of each key and its reference before comparing. """
     t_axis = 1
-    differences = {}
-    ratios = {}
-    for k in ref_analytics.keys():
-        if (ref_analytics[k].ndim > 1) and (analytics[k].ndim > 1):
-            t_end = np.min([ref_analytics[k].shape[t_axis],
-                           analytics[k].shape[t_axis]])
-            differences[k +
-                        DIFF_KEY] = jnp.subtract(analytics[k][:, :t_end], ref_analytics[k][:, :t_end])
-            ratios[k + RATIO_KEY] = jnp.where(ref_analytics[k][:, :t_end] !=
-                                              0, jnp.divide(analytics[k][:, :t_end], ref_analytics[k][:, :t_end]), np.inf)
-        else:
-            differences[k +
-                        DIFF_KEY] = jnp.subtract(analytics[k], ref_analytics[k])
-            ratios[k + RATIO_KEY] = jnp.where(ref_analytics[k] !=
-                                              0, jnp.divide(analytics[k], ref_analytics[k]), np.inf)
-    return differences, ratios
+    ts_keys = [k for k in ref_analytics.keys()
+               if (ref_analytics[k].ndim > 1) and (analytics[k].ndim > 1)]
+    sc_keys = [k for k in ref_analytics.keys() if k not in ts_keys]
+
+    analytics_t = {k: analytics[k] for k in sc_keys}
+    ref_analytics_t = {k: ref_analytics[k] for k in sc_keys}
+    # Keys that share a length are sliced together
+    t_ends = {k: min(analytics[k].shape[t_axis], ref_analytics[k].shape[t_axis]) for k in ts_keys}
+    for t_end in set(t_ends.values()):
+        keys = [k for k in ts_keys if t_ends[k] == t_end]
+        analytics_t.update(jax.tree_util.tree_map(
+            lambda a: a[:, :t_end], {k: analytics[k] for k in keys}))
+        ref_analytics_t.update(jax.tree_util.tree_map(
+            lambda a: a[:, :t_end], {k: ref_analytics[k] for k in keys}))
+
+    differences, ratios = _differences_ratios(analytics_t, ref_analytics_t)
+    return {k + DIFF_KEY: v for k, v in differences.items()}, \
+        {k + RATIO_KEY: v for k, v in ratios.items()}
 
 
 def generate_analytics(data: jnp.ndarray, time, labels: list, ref_circuit_data: Optional[jnp.ndarray] = None,
-                       signal_onehot: Optional[jnp.ndarray] = None, signal_time=None):
+                       signal_onehot: Optional[jnp.ndarray] = None, signal_time=None, use_numba: bool = False):
+    """ use_numba: compute the analytics with the CPU-only Numba backend in 
+    `timeseries_numba`, which has less call overhead for small concrete arrays 
+    but cannot be traced by JAX. """
     if data.shape[0] != len(labels):
         species_axis = data.shape.index(len(labels))
-        data = np.swapaxes(data, 0, species_axis)  # type: ignore
-    analytics = generate_base_analytics(data=data, t=time, labels=labels,
-                                        signal_onehot=signal_onehot, signal_time=signal_time,
-                                        ref_circuit_data=ref_circuit_data)
+        # Keep jax arrays on device, but don't move numpy data there just for numba
+        data = (np if use_numba else jnp).moveaxis(data, species_axis, 0)  # type: ignore
+    base_analytics_func = generate_base_analytics
+    if use_numba:
+        from synbio_morpher.utils.results.analytics.timeseries_numba import generate_base_analytics as base_analytics_func
+    analytics = base_analytics_func(data=data, t=time, labels=labels,
+                                    signal_onehot=signal_onehot, signal_time=signal_time,
+                                    ref_circuit_data=ref_circuit_data)
 
     # Differences & ratios
     # ref_analytics = generate_base_analytics(data=ref_circuit_data, t=time, labels=labels,
@@ -320,6 +455,23 @@ def generate_analytics(data: jnp.ndarray, time, labels: list, ref_circuit_data:
     return analytics
 
 
+def generate_analytics_batched(data: jnp.ndarray, time, labels: list, ref_circuit_data: Optional[jnp.ndarray] = None,
+                               signal_onehot: Optional[jnp.ndarray] = None, signal_time=None) -> dict:
+    """ Analytics for a batch of circuits in a single XLA program. Assuming 
+    [circuits, species, time] for data. The ref_circuit_data can either be 
+    shared by all circuits ([species, time]) or batched alongside the data. 
+    Returns the same keys as generate_analytics, with a leading circuit axis. """
+    if data.shape[1] != len(labels):
+        species_axis = data.shape[1:].index(len(labels)) + 1
+        data = jnp.moveaxis(data, species_axis, 1)  # type: ignore
+    signal_idxs = get_signal_idxs(signal_onehot)
+    ref_batched = (ref_circuit_data is not None) and (
+        jnp.ndim(ref_circuit_data) == jnp.ndim(data))
+
+    return make_analytics_dict(_base_analytics_core_batched(
+        data, time, signal_idxs, signal_time, ref_circuit_data, ref_batched=ref_batched), signal_idxs)
+
+
 class Timeseries():
     def __init__(self, data, time=None) -> None:
         self.data = data
@@ -0,0 +1,138 @@
+
+# Copyright (c) 2023, Olivia Gallup
+# All rights reserved.
+
+# This source code is licensed under the MIT-style license found in the
+# LICENSE file in the root directory of this source tree.
+
+
+""" CPU-only Numba versions of the analytics in `timeseries`, for callers
+with small, concrete numpy arrays (e.g. post-hoc analysis scripts) where the
+JAX dispatch latency dominates. These cannot be traced by JAX, so do not use
+them inside jit / vmap / grad. """
+
+from typing import List, Optional
+import numpy as np
+from numba import njit
+from synbio_morpher.utils.results.analytics.timeseries import get_signal_idxs, make_analytics_dict, _DTYPE
+
+
+# Division by zero follows numpy (inf / nan) instead of raising
+NJIT_KWARGS = {'cache': True, 'error_model': 'numpy'}
+
+
+@njit(**NJIT_KWARGS)
+def _safe_div(numer, denom, fallback):
+    out = np.empty(denom.shape, denom.dtype)
+    for i in range(denom.shape[0]):
+        out[i] = fallback if denom[i] == 0 else numer[i] / denom[i]
+    return out
+
+
+@njit(**NJIT_KWARGS)
+def compute_fold_change(starting_states, steady_states):
+    return _safe_div(steady_states, starting_states, np.nan)
+
+
+@njit(**NJIT_KWARGS)
+def compute_overshoot(steady_states, peaks):
+    return np.absolute(peaks - steady_states)
+
+
+@njit(**NJIT_KWARGS)
+def compute_peaks(initial_steady_states, final_steady_states, maxa, mina):
+    return np.where(final_steady_states > initial_steady_states, maxa, mina)
+
+
+@njit(**NJIT_KWARGS)
+def compute_precision(starting_states, steady_states, signal_0, signal_1):
+    numer = 1.0 if signal_0 == 0 else (signal_1 - signal_0) / signal_0
+    denom = _safe_div(steady_states - starting_states, starting_states, 1.0)
+    return np.absolute(numer / denom).astype(denom.dtype)
+
+
+@njit(**NJIT_KWARGS)
+def compute_sensitivity(signal_idx, starting_states, peaks):
+    signal_0 = starting_states[signal_idx]
+    if signal_0 == 0:
+        return np.full(starting_states.shape, np.inf, starting_states.dtype)
+    signal_ratio = (peaks[signal_idx] - signal_0) / signal_0
+
+    output_diff = peaks - starting_states
+    numer = _safe_div(np.where(output_diff != 0, output_diff, np.nan),
+                      starting_states, np.inf)
+    return np.abs(numer / signal_ratio)
+
+
+@njit(**NJIT_KWARGS)
+def compute_rmse(data, ref_circuit_data):
+    t_max = min(data.shape[-1], ref_circuit_data.shape[-1])
+    out = np.empty(data.shape[0], data.dtype)
+    for i in range(data.shape[0]):
+        out[i] = np.sqrt(
+            np.mean((data[i, :t_max] - ref_circuit_data[i, :t_max])**2))
+    return out
+
+
+@njit(**NJIT_KWARGS)
+def compute_step_response_times(data, t, steady_states, signal_time):
+    """ Same as `timeseries.compute_step_response_times`, but steady_states
+    is [species] and the time axis is walked backwards per species, stopping
+    at the last point outside of the settling band. """
+    perc_settling_time = 0.01
+    n_t = data.shape[-1]
+    response_times = np.full(data.shape[0], np.inf, data.dtype)
+    for i in range(data.shape[0]):
+        tol = steady_states[i] * perc_settling_time
+        for j in range(n_t - 1, -1, -1):
+            if np.abs(data[i, j] - steady_states[i]) > tol:
+                if j < n_t - 1:
+                    response_times[i] = t[j + 1] - signal_time
+                break
+    return response_times
+
+
+def generate_base_analytics(data: np.ndarray, t: np.ndarray, labels: List[str],
+                            signal_onehot: Optional[np.ndarray], signal_time,
+                            ref_circuit_data: Optional[np.ndarray], include_deriv: bool = False) -> dict:
+    """ Numba backend for `timeseries.generate_base_analytics`, with the same
+    keys. Assuming [species, time] for data. Computes in the same _DTYPE
+    as the JAX backend so that the two agree to its precision. """
+    signal_idxs = get_signal_idxs(signal_onehot)
+    if data is None:
+        return {}
+    dtype = np.dtype(_DTYPE)
+    data = np.asarray(data, dtype=dtype)
+    t = np.asarray(t, dtype=dtype)
+
+    initial_steady_states = data[:, 0].copy()
+    steady_states = data[:, -1].copy()
+    max_amount = data.max(axis=1)
+    min_amount = data.min(axis=1)
+
+    rmse = np.zeros(data.shape[0], dtype) if ref_circuit_data is None else compute_rmse(
+        data, np.asarray(ref_circuit_data, dtype=dtype))
+    fold_change = compute_fold_change(initial_steady_states, steady_states)
+    peaks = compute_peaks(initial_steady_states, steady_states, max_amount, min_amount)
+    overshoot = compute_overshoot(steady_states, peaks)
+
+    # t axis: 1
+    t_end = np.min([len(t), data.shape[1]])
+    response_time = compute_step_response_times(
+        data[:, :t_end], t[:t_end], steady_states, float(signal_time)) if signal_idxs else None
+
+    precisions = tuple(compute_precision(
+        initial_steady_states, steady_states, initial_steady_states[s_idx], peaks[s_idx])
+        for s_idx in signal_idxs)
+    response_times = tuple(response_time for _ in signal_idxs)
+    sensitivities = tuple(compute_sensitivity(
+        s_idx, initial_steady_states, peaks) for s_idx in signal_idxs)
+
+    analytics = make_analytics_dict(
+        (initial_steady_states, max_amount, min_amount, steady_states, rmse,
+         fold_change, overshoot, precisions, response_times, sensitivities), signal_idxs)
+
+    if include_deriv:
+        analytics['first_derivative'] = np.full(data.shape, np.inf, dtype) if data.shape[1] <= 1 else np.gradient(
+            data, axis=1)
+    return analytics
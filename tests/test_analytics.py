@@ -1,13 +1,18 @@
 import unittest
+import importlib.util
 import numpy as np
 import jax
 from functools import partial
+from itertools import product
 from copy import deepcopy
+from unittest.mock import patch
 
 
 from synbio_morpher.utils.common.testing.shared import create_test_inputs, CONFIG, TEST_CONFIG
-from synbio_morpher.utils.results.analytics.naming import get_true_names_analytics, RATIO_KEY
-from synbio_morpher.utils.results.analytics.timeseries import generate_analytics
+from synbio_morpher.utils.results.analytics.naming import get_true_names_analytics, DIFF_KEY, RATIO_KEY
+from synbio_morpher.utils.results.analytics import timeseries
+from synbio_morpher.utils.results.analytics.timeseries import generate_analytics, generate_analytics_batched, \
+    compute_step_response_times, generate_differences_ratios, frequency
 from synbio_morpher.utils.signal.signals_new import SignalFuncs
 
 
@@ -148,6 +153,132 @@ class TestAnalytics(unittest.TestCase):
             ]
             self.assertTrue(all(info[positive_cols] > 0))
 
+    def test_batched_analytics(self):
+
+        num_species = 3
+        fake_species = [str(i) for i in np.arange(num_species)]
+        signal_onehot = np.array([1, 0, 1])
+
+        t1 = 100
+        t = np.arange(0, t1)
+        baseline = 20
+
+        jax.config.update('jax_platform_name', 'cpu')
+
+        b_data = np.asarray([[
+            SignalFuncs.step_function_integrated(t, t1/2 + i + j, target=100 + i * j) +
+            SignalFuncs.step_function(
+                t, t1/2 + i, impulse_halfwidth=10, target=110) for i in range(num_species)]
+            for j in range(4)]) + baseline
+        ref_circuit_data = b_data[0]
+
+        b_analytics = generate_analytics_batched(
+            b_data, time=t, labels=fake_species, ref_circuit_data=ref_circuit_data,
+            signal_onehot=signal_onehot, signal_time=t1/2)
+
+        for j, data in enumerate(b_data):
+            analytics = generate_analytics(
+                data, time=t, labels=fake_species, ref_circuit_data=ref_circuit_data,
+                signal_onehot=signal_onehot, signal_time=t1/2)
+            self.assertEqual(set(analytics.keys()), set(b_analytics.keys()))
+            for k, v in analytics.items():
+                np.testing.assert_allclose(np.array(b_analytics[k][j]), np.array(v), rtol=1e-6)
+
+    @unittest.skipIf(importlib.util.find_spec('numba') is None, 'numba is not installed')
+    def test_numba_analytics(self):
+
+        num_species = 3
+        fake_species = [str(i) for i in np.arange(num_species)]
+        t1 = 100
+        t = np.arange(0, t1)
+
+        data = np.asarray([
+            SignalFuncs.step_function_integrated(t, t1/2 + i, target=100 + i) +
+            SignalFuncs.step_function(
+                t, t1/2 + i, impulse_halfwidth=10, target=110) for i in range(num_species)]) + 20
+        data[2] = 0
+        # Noisy data is not exact in float32, unlike the step functions
+        data_noisy = 100 + np.cumsum(np.random.default_rng(0).normal(size=(num_species, t1)), axis=1)
+
+        for d, signal_onehot in product([data, data_noisy], [np.array([1, 0, 0]), np.array([1, 1, 0]), None]):
+            kwargs = dict(time=t, labels=fake_species, ref_circuit_data=d[::-1],
+                          signal_onehot=signal_onehot, signal_time=t1/2)
+            analytics = generate_analytics(d, **kwargs)
+            analytics_numba = generate_analytics(d, use_numba=True, **kwargs)
+            self.assertEqual(set(analytics.keys()), set(analytics_numba.keys()))
+            for k, v in analytics.items():
+                self.assertEqual(analytics_numba[k].dtype, v.dtype)
+                # Both compute in float32, but in a different order of operations
+                np.testing.assert_allclose(analytics_numba[k], np.array(v), rtol=1e-5)
+
+    def test_step_response_times_scan(self):
+
+        num_species = 4
+        t1 = 100
+        t = np.arange(0, t1)
+
+        data = np.asarray([
+            SignalFuncs.step_function_integrated(t, t1/2 + i, target=100 + i) +
+            SignalFuncs.step_function(
+                t, t1/2 + i, impulse_halfwidth=10, target=110) for i in range(num_species)]) + 20
+        data[1] = 20
+        data[2, -1] = 0
+        steady_states = data[:, -1:]
+
+        response_times = compute_step_response_times(data, t, steady_states, t1/2)
+        with patch.object(timeseries, 'SCAN_MIN_TIME_POINTS', 0):
+            response_times_scan = compute_step_response_times(data, t, steady_states, t1/2)
+        self.assertTrue(np.isinf(response_times[1]))
+        np.testing.assert_array_equal(np.array(response_times_scan), np.array(response_times))
+
+    def test_differences_ratios(self):
+
+        analytics = {
+            'steady_states': np.array([2., 3., 4.]),
+            'num_steps': np.array([3, 4, 0]),
+            'first_derivative': np.array([[1., 2., 3.], [4., 5., 6.], [7., 8., 9.]]),
+            'second_derivative': np.arange(15.).reshape(3, 5)
+        }
+        ref_analytics = {
+            'steady_states': np.array([1., 0., 2.]),
+            'num_steps': np.array([1, 0, 2]),
+            'first_derivative': np.array([[1., 1., 1.], [2., 0., 2.], [1., 1., 1.]]),
+            'second_derivative': np.ones((3, 4))
+        }
+
+        differences, ratios = generate_differences_ratios(analytics, ref_analytics)
+        self.assertEqual(set(differences.keys()), {k + DIFF_KEY for k in analytics})
+        self.assertEqual(set(ratios.keys()), {k + RATIO_KEY for k in analytics})
+
+        np.testing.assert_array_equal(
+            np.array(differences['steady_states' + DIFF_KEY]), [1., 3., 2.])
+        np.testing.assert_array_equal(
+            np.array(ratios['steady_states' + RATIO_KEY]), [2., np.inf, 2.])
+        np.testing.assert_array_equal(
+            np.array(ratios['first_derivative' + RATIO_KEY]),
+            [[1., 2., 3.], [2., np.inf, 3.], [7., 8., 9.]])
+        # Each time series is truncated to the shorter of itself and its reference
+        np.testing.assert_array_equal(
+            np.array(differences['second_derivative' + DIFF_KEY]),
+            np.arange(15.).reshape(3, 5)[:, :4] - 1)
+
+        # Integer analytics keep their dtype in the difference, ratios are float
+        self.assertTrue(np.issubdtype(differences['num_steps' + DIFF_KEY].dtype, np.integer))
+        np.testing.assert_array_equal(np.array(differences['num_steps' + DIFF_KEY]), [2, 4, -2])
+        self.assertTrue(np.issubdtype(ratios['num_steps' + RATIO_KEY].dtype, np.floating))
+        np.testing.assert_array_equal(np.array(ratios['num_steps' + RATIO_KEY]), [3., np.inf, 0.])
+
+    def test_frequency(self):
+
+        rng = np.random.default_rng(0)
+        for x in [rng.random(64), rng.random((3, 51))]:
+            n = x.shape[-1]
+            freq, spectrum = frequency(x)
+            np.testing.assert_allclose(np.array(freq), np.fft.rfftfreq(n), rtol=1e-6)
+            self.assertEqual(spectrum.shape, x.shape[:-1] + (n // 2 + 1,))
+            np.testing.assert_allclose(
+                np.array(spectrum), np.fft.rfft(x) / n, rtol=1e-4, atol=1e-6)
+
 
 def main():
 